@@ -1,11 +1,11 @@
 # import pandas for dataframe manipulation
 import pandas as pd
-# import time for moderating speed of requests
-import time
 # import newspaper for text extraction
 from newspaper import Article
 # import logging for logging details
 import logging
+# import fetch scheduler for per-domain backoff and circuit breakers
+from fetch_scheduler import FetchScheduler
 
 # Configure logging to show information messages.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 # File paths
 INPUT_CSV = "news_results.csv"   # Input CSV file with URLs - built
 OUTPUT_CSV = "news_results_with_text.csv"  # Output CSV file - currently empty
+DOMAIN_REPORT_CSV = "fetch_domain_report.csv"  # Per-domain error rates and time spent
 
 # Read the CSV (assuming it has one column named "Links")
 df = pd.read_csv(INPUT_CSV)
@@ -58,22 +59,45 @@ def main() -> None:
     # Initially, this column can be empty.
     df["text"] = ""
     
-    # Loop through each row in the DataFrame.
-    for index, row in df.iterrows():
-        url = row["actual_url"]
-        # logging for testing
-        logger.info(f"Processing {index+1}/{len(df)}: {url}")
-        # Extract the article text from the URL.
-        article_text = extract_article_text(url)
-        # Update the 'text' column for this row.
-        df.at[index, "text"] = article_text
-        # Pause briefly to avoid overloading the server - two seconds
-        time.sleep(2)
-    
+    # Collect the URLs to fetch.
+    urls = []
+    for index, url in df["actual_url"].items():
+        # Blank URLs are read as NaN - mark them as failed rather than fetching them
+        if not isinstance(url, str) or url.strip() == "":
+            logger.error(f"No URL provided at row {index+1}")
+            df.at[index, "text"] = "Failed to extract: No URL provided"
+            continue
+        urls.append((index, url))
+
+    # Fetch every URL through the scheduler - one request at a time per site, pausing two seconds after each response,
+    # backing off further for slow or failing sites and deferring sites that keep failing
+    scheduler = FetchScheduler(
+        extract_article_text,
+        is_failure=lambda text: text.startswith("Failed to extract:"),
+        base_delay=2.0,
+        max_per_domain=1,
+    )
+    results = scheduler.run(urls)
+
+    # Update the 'text' column for each row.
+    # Skipped URLs get the same "Failed to extract:" prefix as other failures.
+    for index, _ in urls:
+        result = results[index]
+        if result.ok:
+            df.at[index, "text"] = result.value
+        elif result.error.startswith("Failed to extract:"):
+            df.at[index, "text"] = result.error
+        else:
+            df.at[index, "text"] = f"Failed to extract: {result.error}"
+
     # Write the updated DataFrame to a new CSV file.
     # The output CSV will contain the original headers plus the new 'text' column.
     df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
     logger.info(f"Extraction complete! Data saved to {OUTPUT_CSV}")
 
+    # Write the per-domain report so failing publishers can be reviewed.
+    pd.DataFrame(scheduler.report()).to_csv(DOMAIN_REPORT_CSV, index=False, encoding="utf-8")
+    logger.info(f"Domain report saved to {DOMAIN_REPORT_CSV}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,6 +4,8 @@ import logging
 import time
 from transformers import pipeline
 import os
+# compact score store for analysis
+import score_store
 
 # Check if CSV exists
 print("CSV exists:", os.path.exists("output_for_sentiment_delimited.csv"))
@@ -23,7 +25,7 @@ nlp = pipeline(
 # Define emotion labels corresponding to the model
 emotion_labels = ["sadness", "joy", "love", "anger", "fear", "surprise"]
 
-def process_sentiment_csv(input_csv, output_csv, column_name):
+def process_sentiment_csv(input_csv, output_csv, column_name, store_prefix=None, keyword_column="message_title"):
     # Read CSV
     df = pd.read_csv(input_csv)
 
@@ -31,8 +33,8 @@ def process_sentiment_csv(input_csv, output_csv, column_name):
         logger.error(f"Error: Column '{column_name}' not found in CSV.")
         raise ValueError(f"Column '{column_name}' not found in CSV.")
     
-    # Prepare dictionary for storing scores
-    scores_dict = {emotion: [] for emotion in emotion_labels}
+    # Prepare float32 matrix for storing scores - rows left as NaN were not scored
+    scores = score_store.empty_scores(len(df), emotion_labels)
 
     # Process each row
     for idx, text in enumerate(df[column_name]):
@@ -41,30 +43,32 @@ def process_sentiment_csv(input_csv, output_csv, column_name):
             for r in results[0]:
                 # Convert LABEL_X to index
                 label_index = int(r['label'].replace("LABEL_", ""))
-                emotion = emotion_labels[label_index]
-                score = r['score']
-                scores_dict[emotion].append(score)
-        else:
-            for emotion in emotion_labels:
-                scores_dict[emotion].append(None)
+                scores[idx, label_index] = r['score']
 
         logger.info(f"Processed row {idx + 1}/{len(df)}")
         time.sleep(0.1)
 
     # Add emotion columns to the DataFrame
-    for emotion in emotion_labels:
-        df[emotion] = scores_dict[emotion]
+    for i, emotion in enumerate(emotion_labels):
+        df[emotion] = scores[:, i]
 
     # Save the updated CSV
     df.to_csv(output_csv, index=False, encoding="utf-8")
     logger.info(f"Processed CSV saved as '{output_csv}'.")
 
+    # Save the compact score store, keyed by row position in the input CSV
+    if store_prefix:
+        keywords = df[keyword_column].fillna("") if keyword_column in df.columns else [""] * len(df)
+        score_store.save_scores(store_prefix, scores, list(range(len(df))), keywords, emotion_labels)
+        logger.info(f"Score store saved with prefix '{store_prefix}'.")
+
 def main():
     input_csv = "output_for_sentiment_delimited.csv"
     output_csv = "analysis_file_all_functions_applied.csv"
     column_name = "processed_text"
+    store_prefix = "analysis_scores"
 
-    process_sentiment_csv(input_csv, output_csv, column_name)
+    process_sentiment_csv(input_csv, output_csv, column_name, store_prefix)
 
 if __name__ == "__main__":
     main()
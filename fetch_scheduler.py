@@ -0,0 +1,257 @@
+# Fetch scheduler used by the link text extraction scripts
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of fetching one URL.
+    """
+    url: str
+    ok: bool
+    value: str = ""
+    error: str = ""
+    skipped: bool = False  # True if the URL was never fetched because its domain's circuit stayed open
+
+
+@dataclass
+class DomainStats:
+    """
+    Running record of how a single domain has behaved.
+    """
+    domain: str
+    queue: deque = field(default_factory=deque)
+    deferred: list = field(default_factory=list)
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    avg_latency: float = 0.0  # exponentially weighted, in seconds
+    in_flight: int = 0
+    concurrency: int = 1
+    delay: float = 0.0        # minimum gap after a response before the next request to this domain
+    next_start: float = 0.0
+    circuit_open: bool = False
+    time_spent: float = 0.0
+
+    @property
+    def error_rate(self):
+        return self.failures / self.requests if self.requests else 0.0
+
+
+def domain_of(url):
+    """
+    Returns the host of a URL without a leading "www.", used to group URLs by publisher.
+    Anything that is not a string (e.g. a blank CSV cell read as NaN) has no domain.
+    """
+    if not isinstance(url, str):
+        return ""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class FetchScheduler:
+    """
+    Fetches many URLs concurrently while tracking each domain's error rate and latency.
+
+    Domains that keep failing have their circuit opened: their remaining URLs are deferred
+    rather than each burning a full timeout. Deferred URLs are retried at the end with a
+    single probe per domain. Backoff and concurrency are adapted per domain from observed
+    response times, so a few slow or hostile publishers cannot dominate the run.
+
+    The scheduler has no deadline of its own - fetch must enforce its own timeout, otherwise
+    a host that never answers keeps a worker busy indefinitely.
+    """
+
+    def __init__(self, fetch, is_failure=None, max_workers=4, max_per_domain=2, base_delay=1.0,
+                 max_delay=30.0, slow_latency=5.0, failure_threshold=3, error_rate_threshold=0.5,
+                 min_requests=4):
+        """
+        :param fetch: Callable taking a URL and returning its text. Exceptions count as failures.
+                      It must time out by itself (e.g. requests' timeout argument).
+        :param is_failure: Optional callable taking the returned text and returning True if it is an error message.
+        :param max_workers: Total number of requests in flight across all domains.
+        :param max_per_domain: Upper limit on requests in flight to one domain.
+        :param base_delay: Minimum gap in seconds between a response from a domain and the next request to it.
+                           Parallel requests to one domain are also started at least this far apart.
+        :param max_delay: Upper limit on the per-domain backoff in seconds.
+        :param slow_latency: Once a domain's average response time exceeds this (seconds) its concurrency is reduced
+                             and the gap after each response grows to its average response time.
+        :param failure_threshold: Consecutive failures after which a domain's circuit is opened.
+        :param error_rate_threshold: Error rate after which a domain's circuit is opened.
+        :param min_requests: Requests to a domain before the error rate is taken into account.
+        """
+        self.fetch = fetch
+        self.is_failure = is_failure or (lambda value: False)
+        self.max_workers = max_workers
+        self.max_per_domain = max_per_domain
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slow_latency = slow_latency
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.domains = {}
+
+    def run(self, items):
+        """
+        Fetches every URL and returns the results.
+
+        :param items: Iterable of (key, url) pairs. The key is returned with the result, e.g. a DataFrame index.
+        :return: Dict mapping each key to a FetchResult.
+        """
+        results = {}
+        for key, url in items:
+            domain = domain_of(url)
+            if domain not in self.domains:
+                self.domains[domain] = DomainStats(domain, delay=self.base_delay)
+            self.domains[domain].queue.append((key, url))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._drain(executor, results)
+
+            # Retry deferred URLs now the healthy domains are done - each domain gets a fresh probe
+            retry_domains = [stats for stats in self.domains.values() if stats.deferred]
+            for stats in retry_domains:
+                logger.info(f"Retrying {len(stats.deferred)} deferred URLs for {stats.domain}")
+                stats.queue.extend(stats.deferred)
+                stats.deferred = []
+                stats.circuit_open = False
+                stats.consecutive_failures = self.failure_threshold - 1  # one more failure re-opens the circuit
+                stats.concurrency = 1
+            self._drain(executor, results)
+
+        # Anything still deferred was never fetched because the domain failed its probe
+        for stats in self.domains.values():
+            for key, url in stats.deferred:
+                results[key] = FetchResult(url, ok=False, error=f"Skipped: circuit open for {stats.domain}",
+                                           skipped=True)
+        self.log_summary()
+        return results
+
+    def _drain(self, executor, results):
+        """
+        Submits queued URLs, respecting each domain's delay and concurrency, until none are left.
+        """
+        running = {}
+        while running or any(stats.queue for stats in self.domains.values()):
+            now = time.monotonic()
+            for stats in self.domains.values():
+                while (stats.queue and len(running) < self.max_workers
+                       and stats.in_flight < stats.concurrency and stats.next_start <= now):
+                    key, url = stats.queue.popleft()
+                    stats.in_flight += 1
+                    stats.next_start = now + stats.delay
+                    running[executor.submit(self._timed_fetch, url)] = (key, url, stats)
+
+            if not running:
+                # Every domain with work left is waiting out its delay
+                waits = [stats.next_start for stats in self.domains.values() if stats.queue]
+                time.sleep(max(0.0, min(waits) - now))
+                continue
+
+            done, _ = wait(running, timeout=self._next_wake(now), return_when=FIRST_COMPLETED)
+            for future in done:
+                key, url, stats = running.pop(future)
+                stats.in_flight -= 1
+                results[key] = self._record(stats, url, *future.result())
+
+    def _next_wake(self, now):
+        """
+        Seconds until a domain's delay runs out, or None if only a finished request can free up more work.
+        """
+        waits = [stats.next_start - now for stats in self.domains.values() if stats.queue and stats.next_start > now]
+        return min(waits) if waits else None
+
+    def _timed_fetch(self, url):
+        """
+        Runs the fetch function and returns (value, failed, error, latency).
+        """
+        start = time.monotonic()
+        try:
+            value = self.fetch(url)
+            failed = bool(self.is_failure(value))
+            error = value if failed else ""
+        except Exception as e:
+            # Some exceptions carry no message, so fall back to the exception type
+            value, failed, error = "", True, str(e) or type(e).__name__
+        return value, failed, error, time.monotonic() - start
+
+    def _record(self, stats, url, value, failed, error, latency):
+        """
+        Updates a domain's statistics with the outcome of one request and adapts its behaviour.
+        """
+        stats.requests += 1
+        stats.time_spent += latency
+        stats.avg_latency = latency if stats.requests == 1 else 0.7 * stats.avg_latency + 0.3 * latency
+        slow = stats.avg_latency > self.slow_latency
+
+        if failed:
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            # Exponential backoff on repeated failures, counted from when this response arrived
+            stats.delay = min(self.max_delay, self.base_delay * 2 ** stats.consecutive_failures)
+            stats.concurrency = 1
+            logger.warning(f"Fetch failed for {url} ({stats.domain}, {latency:.1f}s): {error}")
+            if not stats.circuit_open and self._should_open(stats):
+                self._open_circuit(stats)
+        else:
+            stats.consecutive_failures = 0
+            # Slow domains get fewer parallel requests and an idle gap as long as their average response time,
+            # fast ones are allowed more parallel requests
+            if slow:
+                stats.concurrency = max(1, stats.concurrency - 1)
+                stats.delay = min(self.max_delay, max(self.base_delay, stats.avg_latency))
+            else:
+                stats.concurrency = min(self.max_per_domain, stats.concurrency + 1)
+                stats.delay = self.base_delay
+
+        # The gap is measured from completion so slow or hanging hosts get real idle time between requests
+        stats.next_start = max(stats.next_start, time.monotonic() + stats.delay)
+        return FetchResult(url, ok=not failed, value=value, error=error)
+
+    def _should_open(self, stats):
+        if stats.consecutive_failures >= self.failure_threshold:
+            return True
+        return stats.requests >= self.min_requests and stats.error_rate >= self.error_rate_threshold
+
+    def _open_circuit(self, stats):
+        """
+        Stops fetching from a domain for the rest of the pass, deferring its remaining URLs.
+        """
+        stats.circuit_open = True
+        stats.deferred.extend(stats.queue)
+        stats.queue.clear()
+        logger.warning(f"Circuit opened for {stats.domain} after {stats.failures}/{stats.requests} failures; "
+                       f"deferring {len(stats.deferred)} URLs")
+
+    def report(self):
+        """
+        Returns one dict per domain describing how it behaved, worst first.
+        """
+        rows = [
+            {
+                "domain": stats.domain,
+                "requests": stats.requests,
+                "failures": stats.failures,
+                "error_rate": round(stats.error_rate, 3),
+                "avg_latency": round(stats.avg_latency, 3),
+                "time_spent": round(stats.time_spent, 3),
+                "skipped": len(stats.deferred),
+                "circuit_open": stats.circuit_open,
+            }
+            for stats in self.domains.values()
+        ]
+        return sorted(rows, key=lambda row: (row["failures"] + row["skipped"], row["time_spent"]), reverse=True)
+
+    def log_summary(self):
+        for row in self.report():
+            if row["failures"] or row["skipped"]:
+                logger.info(f"{row['domain']}: {row['failures']}/{row['requests']} failed, "
+                            f"{row['skipped']} skipped, {row['time_spent']:.1f}s spent")
@@ -0,0 +1,136 @@
+# Compact storage for emotion scores produced by 5_sentimentanalysis.py
+import json
+import numpy as np
+import pandas as pd
+
+# Suffixes for the three files that make up a score store
+SCORES_SUFFIX = "_scores.npy"   # float32 matrix, rows x emotions, NaN where a row was not scored
+INDEX_SUFFIX = "_index.csv"     # one row per message: message_id and keyword (message_title)
+LABELS_SUFFIX = "_labels.json"  # emotion label for each matrix column
+
+
+def empty_scores(n_rows, labels):
+    """
+    Allocates a score matrix with every cell set to NaN (i.e. not yet scored).
+
+    :param n_rows: Number of messages to be scored.
+    :param labels: The emotion labels, one per column.
+    :return: A float32 array of shape (n_rows, len(labels)).
+    """
+    return np.full((n_rows, len(labels)), np.nan, dtype=np.float32)
+
+
+def save_scores(prefix, scores, message_ids, keywords, labels):
+    """
+    Writes the score matrix to a memory-mappable .npy file alongside a small index and label list.
+    The article text is not repeated - join back to the source CSV on message_id if it is needed.
+
+    :param prefix: Path prefix for the output files, e.g. "analysis_scores".
+    :param scores: Score matrix of shape (rows, emotions).
+    :param message_ids: One ID per row of the matrix.
+    :param keywords: One keyword (message_title) per row of the matrix.
+    :param labels: The emotion labels, one per column.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    if scores.shape != (len(message_ids), len(labels)):
+        raise ValueError(f"Score matrix shape {scores.shape} does not match "
+                         f"{len(message_ids)} messages x {len(labels)} emotions.")
+
+    np.save(prefix + SCORES_SUFFIX, scores)
+    pd.DataFrame({"message_id": message_ids, "keyword": keywords}).to_csv(
+        prefix + INDEX_SUFFIX, index=False, encoding="utf-8"
+    )
+    with open(prefix + LABELS_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(list(labels), f)
+
+
+def load_scores(prefix, mmap=True):
+    """
+    Loads a score store written by save_scores.
+
+    :param prefix: Path prefix used when saving.
+    :param mmap: If True the matrix is memory-mapped read-only rather than read into memory.
+    :return: Tuple of (scores, index DataFrame, labels).
+    """
+    scores = np.load(prefix + SCORES_SUFFIX, mmap_mode="r" if mmap else None)
+    index = pd.read_csv(prefix + INDEX_SUFFIX, keep_default_na=False)
+    with open(prefix + LABELS_SUFFIX, encoding="utf-8") as f:
+        labels = json.load(f)
+    return scores, index, labels
+
+
+def load_scores_frame(prefix, mmap=True):
+    """
+    Loads a score store as a DataFrame indexed by message_id, one column per emotion.
+    The frame wraps the (memory-mapped) matrix directly, so no copy of the scores is made.
+
+    :param prefix: Path prefix used when saving.
+    :param mmap: If True the matrix is memory-mapped read-only rather than read into memory.
+    :return: DataFrame of scores.
+    """
+    scores, index, labels = load_scores(prefix, mmap=mmap)
+    return pd.DataFrame(scores, index=pd.Index(index["message_id"]), columns=labels, copy=False)
+
+
+def argmax_emotion(scores, labels):
+    """
+    Finds the strongest emotion for each row.
+
+    :param scores: Score matrix of shape (rows, emotions).
+    :param labels: The emotion labels, one per column.
+    :return: Object array of labels, None for rows that were not scored.
+    """
+    scores = np.asarray(scores)
+    scored = ~np.isnan(scores).all(axis=1)
+    result = np.full(len(scores), None, dtype=object)
+    # NaN is filled with -inf so partially scored rows still pick a real emotion
+    best = np.argmax(np.where(np.isnan(scores[scored]), -np.inf, scores[scored]), axis=1)
+    result[scored] = np.asarray(labels, dtype=object)[best]
+    return result
+
+
+def top_k(scores, k, emotion, labels):
+    """
+    Finds the k rows with the highest score for one emotion.
+
+    :param scores: Score matrix of shape (rows, emotions).
+    :param k: Number of rows to return.
+    :param emotion: Label of the emotion to rank by, e.g. "anger".
+    :param labels: The emotion labels, one per column.
+    :return: Row indices ordered from highest to lowest score. Unscored rows are never returned.
+    """
+    column = np.asarray(scores)[:, list(labels).index(emotion)]
+    candidates = np.flatnonzero(~np.isnan(column))
+    k = min(k, len(candidates))
+    if k <= 0:
+        return candidates[:0]
+    # argpartition avoids sorting the whole column when only the top few are needed
+    top = candidates[np.argpartition(column[candidates], -k)[-k:]]
+    return top[np.argsort(column[top])[::-1]]
+
+
+def aggregate_by_keyword(scores, keywords, labels):
+    """
+    Averages scores per keyword, ignoring rows that were not scored.
+
+    :param scores: Score matrix of shape (rows, emotions).
+    :param keywords: One keyword per row of the matrix.
+    :param labels: The emotion labels, one per column.
+    :return: DataFrame indexed by keyword with the mean score for each emotion and a count of scored rows.
+    """
+    scores = np.asarray(scores)
+    unique, inverse = np.unique(np.asarray(keywords, dtype=str), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    mask = ~np.isnan(scores)
+
+    # Sum and count per keyword in one pass with np.add.at
+    totals = np.zeros((len(unique), scores.shape[1]), dtype=np.float64)
+    counts = np.zeros((len(unique), scores.shape[1]), dtype=np.int64)
+    np.add.at(totals, inverse, np.where(mask, scores, 0.0))
+    np.add.at(counts, inverse, mask)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = totals / counts
+    result = pd.DataFrame(means.astype(np.float32), index=pd.Index(unique, name="keyword"), columns=labels)
+    result["count"] = np.bincount(inverse, weights=mask.any(axis=1), minlength=len(unique)).astype(np.int64)
+    return result
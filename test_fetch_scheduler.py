@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from fetch_scheduler import FetchScheduler, domain_of
+
+
+class StubFetch:
+    """
+    Fake fetch function. Each domain behaves according to the given rule:
+    "ok" returns text, "error" returns an error message, "raise" raises an exception with no message,
+    and an integer n fails the first n calls then succeeds.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        domain = domain_of(url)
+        with self.lock:
+            self.calls[domain] += 1
+            call = self.calls[domain]
+        rule = self.rules[domain]
+        if rule == "error" or (isinstance(rule, int) and call <= rule):
+            return "Error: 403"
+        if rule == "raise":
+            raise TimeoutError()
+        return f"text of {url}"
+
+
+def make_scheduler(fetch, **kwargs):
+    # No delays and one request at a time so the order of outcomes is predictable
+    options = dict(max_workers=1, base_delay=0.0, max_delay=0.0, failure_threshold=3)
+    options.update(kwargs)
+    return FetchScheduler(fetch, is_failure=lambda text: text.startswith("Error"), **options)
+
+
+def urls_for(domain, count, start=0):
+    return [(start + i, f"https://www.{domain}.com/{i}") for i in range(count)]
+
+
+def test_domain_of():
+    assert domain_of("https://www.bbc.co.uk/news/1") == "bbc.co.uk"
+    assert domain_of("http://Example.com/a") == "example.com"
+    assert domain_of(float("nan")) == ""
+
+
+def test_circuit_opens_and_probe_failure_skips_rest():
+    fetch = StubFetch({"bad.com": "error"})
+    scheduler = make_scheduler(fetch)
+
+    results = scheduler.run(urls_for("bad", 6))
+
+    # Three failures open the circuit, then a single probe fails during the retry pass
+    assert fetch.calls["bad.com"] == 4
+    fetched = [results[i] for i in range(4)]
+    skipped = [results[i] for i in range(4, 6)]
+    assert all(not r.ok and not r.skipped and r.error == "Error: 403" for r in fetched)
+    assert all(not r.ok and r.skipped and "circuit open" in r.error for r in skipped)
+
+
+def test_deferred_urls_are_retried_when_probe_succeeds():
+    fetch = StubFetch({"flaky.com": 3})
+    scheduler = make_scheduler(fetch)
+
+    results = scheduler.run(urls_for("flaky", 6))
+
+    assert fetch.calls["flaky.com"] == 6
+    assert [results[i].ok for i in range(6)] == [False, False, False, True, True, True]
+    assert not any(r.skipped for r in results.values())
+    assert scheduler.report()[0]["circuit_open"] is False
+
+
+def test_exceptions_without_message_count_as_failures():
+    fetch = StubFetch({"hang.com": "raise"})
+    scheduler = make_scheduler(fetch)
+
+    results = scheduler.run(urls_for("hang", 5))
+
+    assert not any(r.ok for r in results.values())
+    assert all(r.error == "TimeoutError" for r in results.values() if not r.skipped)
+    row = scheduler.report()[0]
+    assert row["failures"] == row["requests"] == 4
+    assert row["skipped"] == 1
+
+
+def test_report_counts():
+    fetch = StubFetch({"good.com": "ok", "bad.com": "error"})
+    scheduler = make_scheduler(fetch, max_workers=2)
+
+    results = scheduler.run(urls_for("good", 3) + urls_for("bad", 5, start=3))
+
+    assert len(results) == 8
+    assert results[0].value == "text of https://www.good.com/0"
+    report = {row["domain"]: row for row in scheduler.report()}
+    assert report["good.com"]["requests"] == 3
+    assert report["good.com"]["failures"] == 0
+    assert report["good.com"]["skipped"] == 0
+    assert report["good.com"]["circuit_open"] is False
+    assert report["bad.com"]["requests"] == 4
+    assert report["bad.com"]["failures"] == 4
+    assert report["bad.com"]["error_rate"] == pytest.approx(1.0)
+    assert report["bad.com"]["skipped"] == 1
+    assert report["bad.com"]["circuit_open"] is True
+    # The worst domain is listed first
+    assert scheduler.report()[0]["domain"] == "bad.com"
+
+
+class TimedStub:
+    """
+    Fake fetch function that records when each call starts and ends.
+    latencies gives the time each call takes in order, the last value is reused once they run out.
+    """
+
+    def __init__(self, latencies, fail=False):
+        self.latencies = latencies
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        with self.lock:
+            latency = self.latencies[min(len(self.calls), len(self.latencies) - 1)]
+            call = [time.monotonic(), None]
+            self.calls.append(call)
+        time.sleep(latency)
+        call[1] = time.monotonic()
+        return "Error: 403" if self.fail else "text"
+
+    def idle_gaps(self):
+        # Time between one call ending and the next one starting
+        return [nxt[0] - prev[1] for prev, nxt in zip(self.calls, self.calls[1:])]
+
+
+def test_backoff_grows_after_consecutive_failures():
+    fetch = TimedStub([0.05], fail=True)
+    scheduler = FetchScheduler(fetch, is_failure=lambda text: text.startswith("Error"), base_delay=0.05,
+                               max_delay=1.0, failure_threshold=10)
+
+    scheduler.run(urls_for("bad", 4))
+
+    # The gap doubles after each failure: 0.1, 0.2, 0.4 seconds
+    gaps = fetch.idle_gaps()
+    assert gaps[0] >= 0.09
+    assert gaps[1] >= 0.19
+    assert gaps[2] >= 0.39
+    assert gaps[0] < gaps[1] < gaps[2]
+
+
+def test_slow_domain_drops_to_one_request_with_idle_gap():
+    # Fast responses first, so the domain is allowed two requests in flight, then it slows down
+    fetch = TimedStub([0.02] * 4 + [0.3])
+    scheduler = FetchScheduler(fetch, max_workers=2, max_per_domain=2, base_delay=0.0, slow_latency=0.1)
+
+    scheduler.run(urls_for("slow", 9))
+
+    starts_before_end = [nxt[0] < prev[1] for prev, nxt in zip(fetch.calls, fetch.calls[1:])]
+    assert any(starts_before_end[:4])
+    # Once slow, requests no longer overlap and each is followed by an idle gap
+    assert not any(starts_before_end[-2:])
+    assert all(gap >= 0.1 for gap in fetch.idle_gaps()[-2:])
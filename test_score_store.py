@@ -0,0 +1,101 @@
+import mmap
+
+import numpy as np
+import pytest
+
+import score_store
+
+LABELS = ["sadness", "joy", "anger"]
+
+
+@pytest.fixture
+def scores():
+    # Row 1 was never scored, row 3 was only partly scored
+    matrix = score_store.empty_scores(4, LABELS)
+    matrix[0] = [0.1, 0.7, 0.2]
+    matrix[2] = [0.5, 0.3, 0.2]
+    matrix[3] = [np.nan, 0.2, 0.6]
+    return matrix
+
+
+def is_memory_mapped(array):
+    # Walks the chain of views back to the buffer that owns the data
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def test_save_and_load_round_trip(tmp_path, scores):
+    prefix = str(tmp_path / "store")
+    score_store.save_scores(prefix, scores, [10, 11, 12, 13], ["uk", "eu", "uk", ""], LABELS)
+
+    loaded, index, labels = score_store.load_scores(prefix)
+
+    assert loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, scores)
+    assert list(index["message_id"]) == [10, 11, 12, 13]
+    assert list(index["keyword"]) == ["uk", "eu", "uk", ""]
+    assert labels == LABELS
+
+
+def test_save_rejects_mismatched_shape(tmp_path, scores):
+    with pytest.raises(ValueError):
+        score_store.save_scores(str(tmp_path / "store"), scores, [1, 2], ["a", "b"], LABELS)
+
+
+def test_load_scores_frame_stays_memory_mapped(tmp_path, scores):
+    prefix = str(tmp_path / "store")
+    score_store.save_scores(prefix, scores, [10, 11, 12, 13], ["uk", "eu", "uk", ""], LABELS)
+
+    frame = score_store.load_scores_frame(prefix)
+
+    assert list(frame.columns) == LABELS
+    assert list(frame.index) == [10, 11, 12, 13]
+    assert is_memory_mapped(frame.to_numpy())
+    assert not is_memory_mapped(score_store.load_scores_frame(prefix, mmap=False).to_numpy())
+
+
+def test_argmax_emotion_skips_unscored_rows(scores):
+    result = score_store.argmax_emotion(scores, LABELS)
+    assert list(result) == ["joy", None, "sadness", "anger"]
+
+
+def test_argmax_emotion_all_unscored():
+    result = score_store.argmax_emotion(score_store.empty_scores(2, LABELS), LABELS)
+    assert list(result) == [None, None]
+
+
+def test_top_k_orders_by_score(scores):
+    assert list(score_store.top_k(scores, 2, "joy", LABELS)) == [0, 2]
+
+
+def test_top_k_zero_returns_nothing(scores):
+    assert len(score_store.top_k(scores, 0, "sadness", LABELS)) == 0
+
+
+def test_top_k_larger_than_scored_rows(scores):
+    # Row 1 is unscored and row 3 has no sadness score, so only two rows can be returned
+    assert list(score_store.top_k(scores, 10, "sadness", LABELS)) == [2, 0]
+
+
+def test_top_k_unknown_emotion(scores):
+    with pytest.raises(ValueError):
+        score_store.top_k(scores, 1, "love", LABELS)
+
+
+def test_aggregate_by_keyword_ignores_nan(scores):
+    result = score_store.aggregate_by_keyword(scores, ["uk", "eu", "uk", ""], LABELS)
+
+    assert list(result.index) == ["", "eu", "uk"]
+    assert result.loc["uk", "sadness"] == pytest.approx(0.3)
+    assert result.loc["uk", "joy"] == pytest.approx(0.5)
+    assert result.loc["uk", "count"] == 2
+    # The empty keyword has no sadness score but still counts as one scored row
+    assert np.isnan(result.loc["", "sadness"])
+    assert result.loc["", "anger"] == pytest.approx(0.6)
+    assert result.loc["", "count"] == 1
+    # A keyword whose only row was never scored
+    assert result.loc["eu"].drop("count").isna().all()
+    assert result.loc["eu", "count"] == 0
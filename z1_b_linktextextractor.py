@@ -2,7 +2,11 @@ import csv
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
+import logging
+from fetch_scheduler import FetchScheduler
+
+# Configure logging so the scheduler's retries and per-domain summary are shown
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def fetch_article_text(url):
     """
@@ -47,7 +51,7 @@ def fetch_article_text(url):
         # Return error message for failed requests (e.g., timeouts, 404 errors)
         return f"Error: {e}"
 
-def process_csv(input_csv, output_csv, error_log_csv):
+def process_csv(input_csv, output_csv, error_log_csv, domain_report_csv=None):
     """
     Reads a CSV file with news article links, extracts text from each link,
     and writes the data into a new CSV file with an additional "Article Text" column.
@@ -56,6 +60,7 @@ def process_csv(input_csv, output_csv, error_log_csv):
     :param input_csv: The name of the input CSV file (from the first script).
     :param output_csv: The name of the output CSV file with extracted text.
     :param error_log_csv: The name of the CSV file where errors will be logged.
+    :param domain_report_csv: Optional CSV file for per-domain error rates and time spent.
     """
     # Read the input CSV file using pandas
     df = pd.read_csv(input_csv)
@@ -71,30 +76,40 @@ def process_csv(input_csv, output_csv, error_log_csv):
     # Create a list to store failed extractions
     failed_extractions = []
 
-    # Loop through each row in the dataframe
+    # Collect the URLs to fetch, skipping empty ones
+    urls = []
     for index, row in df.iterrows():
         url = row["Source URL"]
 
         # Skip empty URLs
         if pd.isna(url) or url.strip() == "":
             print(f"Skipping empty URL at row {index + 1}")
-            failed_extractions.append({"Source URL": "EMPTY", "Error": "No URL provided"})
             continue
 
-        print(f"Extracting text from: {url} ({index+1}/{len(df)})")
+        urls.append((index, url))
+
+    print(f"Extracting text from {len(urls)} URLs")
 
-        # Extract the article text from the given URL
-        article_text = fetch_article_text(url)
+    # Extract the article text through the scheduler - one request at a time per website, pausing a second after each response.
+    # It backs off from slow or failing websites and defers those that keep failing until the end
+    scheduler = FetchScheduler(fetch_article_text, is_failure=lambda text: text.startswith("Error"), max_per_domain=1)
+    results = scheduler.run(urls)
+
+    # Go through the rows in input order so the error log follows the input CSV
+    for index, url in df["Source URL"].items():
+        # Empty URLs were never fetched
+        if index not in results:
+            failed_extractions.append({"Source URL": "EMPTY", "Error": "No URL provided"})
+            continue
+
+        result = results[index]
 
         # If extraction failed, add it to the error log
-        if article_text.startswith("Error"):
-            failed_extractions.append({"Source URL": url, "Error": article_text})
+        if not result.ok:
+            failed_extractions.append({"Source URL": url, "Error": result.error})
         else:
             # Otherwise, save the extracted text to the dataframe
-            df.at[index, "Article Text"] = article_text
-
-        # Pause between requests to avoid overloading the website (optional)
-        time.sleep(1)
+            df.at[index, "Article Text"] = result.value
 
     # Save the successfully extracted data to a new CSV file
     df.to_csv(output_csv, index=False, encoding="utf-8")
@@ -106,6 +121,11 @@ def process_csv(input_csv, output_csv, error_log_csv):
         error_df.to_csv(error_log_csv, index=False, encoding="utf-8")
         print(f"Failed extractions logged in: {error_log_csv}")
 
+    # Save the per-domain report so failing websites can be reviewed
+    if domain_report_csv:
+        pd.DataFrame(scheduler.report()).to_csv(domain_report_csv, index=False, encoding="utf-8")
+        print(f"Domain report saved as: {domain_report_csv}")
+
 def main():
     """
     Main function to process the CSV file and extract article text.
@@ -113,9 +133,10 @@ def main():
     input_csv = "news_results.csv"     # Input file (from the previous script)
     output_csv = "news_with_text.csv"  # Output file with extracted article text
     error_log_csv = "failed_extractions.csv"  # Log file for failed extractions
+    domain_report_csv = "fetch_domain_report.csv"  # Per-domain error rates and time spent
 
     # Run the processing function
-    process_csv(input_csv, output_csv, error_log_csv)
+    process_csv(input_csv, output_csv, error_log_csv, domain_report_csv)
 
 if __name__ == "__main__":
     main()